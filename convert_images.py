@@ -1,31 +1,39 @@
 import os
+import re
 
 FOLDER = "images"
 PREFIX = "minecraft_"
 KNOWN_PREFIXES = ["mc_", "mc_minecraft_", "minecraft_minecraft_", "minecraft_"]
+VERBOSE = os.getenv("VERBOSE", "") not in ("", "0")
+
+# Longest prefix first, so "mc_minecraft_" wins over "mc_"
+_PREFIX_RE = re.compile(
+    "^(?:" + "|".join(re.escape(p) for p in sorted(KNOWN_PREFIXES, key=len, reverse=True)) + ")"
+)
 
 def strip_known_prefixes(filename):
-    for known in KNOWN_PREFIXES:
-        if filename.startswith(known):
-            return filename[len(known):]
-    return filename
+    return _PREFIX_RE.sub("", filename, count=1)
 
 def rename_files_clean_prefix():
-    for fname in os.listdir(FOLDER):
-        path = os.path.join(FOLDER, fname)
-        if not os.path.isfile(path):
+    # Snapshot the listing first, renaming while scandir iterates is unsafe
+    with os.scandir(FOLDER) as it:
+        entries = list(it)
+
+    for entry in entries:
+        if not entry.is_file():
             continue
 
-        clean_name = strip_known_prefixes(fname)
+        clean_name = strip_known_prefixes(entry.name)
         new_name = PREFIX + clean_name
 
-        if fname == new_name:
-            print(f"✅ Already clean: {fname}")
+        if entry.name == new_name:
+            if VERBOSE:
+                print(f"✅ Already clean: {entry.name}")
             continue
 
         new_path = os.path.join(FOLDER, new_name)
-        os.rename(path, new_path)
-        print(f"🔁 Renamed: {fname} → {new_name}")
+        os.rename(entry.path, new_path)
+        print(f"🔁 Renamed: {entry.name} → {new_name}")
 
 if __name__ == "__main__":
     rename_files_clean_prefix()
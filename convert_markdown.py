@@ -1,9 +1,17 @@
 import markdown
 
-with open("carcosa.md", "r", encoding="utf-8") as f:
-    text = f.read()
+# One parser for the whole run, reset() between documents instead of rebuilding it
+_MD = markdown.Markdown(extensions=[])
 
-html = markdown.markdown(text)
+def convert_one(path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
 
-with open("carcosa.html", "w", encoding="utf-8") as f:
-    f.write(html)
+    _MD.reset()
+    return _MD.convert(text)
+
+if __name__ == "__main__":
+    html = convert_one("carcosa.md")
+
+    with open("carcosa.html", "w", encoding="utf-8") as f:
+        f.write(html)
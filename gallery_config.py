@@ -116,8 +116,9 @@ FOOTER_TEXT = f"Built with ❤️ for {SERVER_NAME} | Powered by Enhanced Minecr
 DEBUG_MODE = False
 VERBOSE_LOGGING = True
 
-print("📝 Configuration loaded successfully!")
-print(f"🏷️  Available tags: {len(AVAILABLE_TAGS)} categories")
-print(f"⚙️  Images per page: {IMAGES_PER_PAGE}")
-print(f"🖼️  Thumbnail size: {THUMBNAIL_WIDTH}x{THUMBNAIL_HEIGHT}")
-print(f"💎 Theme: Minecraft-inspired with {len(THEME_COLORS)} colors")
+if __name__ == "__main__":
+    print("📝 Configuration loaded successfully!")
+    print(f"🏷️  Available tags: {len(AVAILABLE_TAGS)} categories")
+    print(f"⚙️  Images per page: {IMAGES_PER_PAGE}")
+    print(f"🖼️  Thumbnail size: {THUMBNAIL_WIDTH}x{THUMBNAIL_HEIGHT}")
+    print(f"💎 Theme: Minecraft-inspired with {len(THEME_COLORS)} colors")
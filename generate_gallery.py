@@ -2,20 +2,51 @@ import os
 import sys
 import json
 from pathlib import Path
-from math import ceil
-from PIL import Image
+from functools import cache
+from operator import itemgetter
+import PIL
+from PIL import Image, features
 import hashlib
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+try:
+    import orjson  # Optional, much faster JSON encoder
+except ImportError:
+    orjson = None
+
+try:
+    import pyvips  # Optional, libvips thumbnails faster and in far less memory than Pillow
+except (ImportError, OSError):
+    pyvips = None
 
 IMAGE_FOLDER = "images"
 THUMBNAIL_FOLDER = "thumbnails"
 OUTPUT_FOLDER = os.getenv("GALLERY_OUTPUT_FOLDER", ".")
 OUTPUT_PREFIX = "index"
+METADATA_FILE = "gallery_metadata.json"
+# Build-side cache of [mtime, size, aspect_ratio] per source, kept beside images/ so it is never deployed
+CACHE_FILE = ".gallery_cache.json"
 R2_BASE_URL = os.getenv("R2_BASE_URL", "").rstrip("/")
-VALID_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
-IMAGES_PER_PAGE = 20  # Reduced for better performance
+VALID_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')  # Tuple so it can go straight into str.endswith
+IMAGES_PER_PAGE = 20  # Cards the page renders per batch as you scroll
 THUMBNAIL_WIDTH = 400  # Increased for better quality
 THUMBNAIL_HEIGHT = 300
 WEBP_QUALITY = 85
+WEBP_METHOD = int(os.getenv("WEBP_METHOD", 0))  # 0 is libwebp's fastest encoder, 6 its smallest output
+try:
+    MAX_WORKERS = max(1, int(os.getenv("GALLERY_MAX_WORKERS", "")))
+except ValueError:
+    if os.getenv("GALLERY_MAX_WORKERS"):
+        print(f"⚠️ Ignoring GALLERY_MAX_WORKERS={os.getenv('GALLERY_MAX_WORKERS')!r}, expected a number")
+    MAX_WORKERS = os.cpu_count() or 1
+# Record thumbnail URLs without building them, make_thumb.py fills them in on demand
+LAZY_THUMBS = os.getenv("GALLERY_LAZY_THUMBS", "") not in ("", "0")
+# libwebp's own encoder, used for the formats it can read when libvips isn't available
+USE_CWEBP = shutil.which("cwebp") is not None
+CWEBP_FORMATS = frozenset({'JPEG', 'PNG', 'WEBP'})
 
 # Available tags for categorization
 AVAILABLE_TAGS = [
@@ -23,35 +54,91 @@ AVAILABLE_TAGS = [
     "mining", "nether", "end", "village", "castle", "modern", "medieval"
 ]
 
+def fitted_size(width, height):
+    """Size of an image scaled down to fit the thumbnail box, keeping its aspect ratio"""
+    scale = min(THUMBNAIL_WIDTH / width, THUMBNAIL_HEIGHT / height, 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
 def create_optimized_thumbnail(image_path, thumbnail_path):
-    """Create optimized WebP thumbnails for better performance"""
+    """Create optimized WebP thumbnails, returns (thumbnail path, original (width, height))"""
+    webp_path = os.path.splitext(thumbnail_path)[0] + '.webp'
     try:
         with Image.open(image_path) as img:
-            # Convert to RGB if necessary (for WebP compatibility)
-            if img.mode in ('RGBA', 'LA', 'P'):
+            # Grab the original size before draft()/thumbnail() shrink it
+            size = img.size
+            
+            # An old thumbnail may be a hardlink to this very source (see below), unlink it
+            # so no backend writes through it into the original image
+            try:
+                os.remove(webp_path)
+            except FileNotFoundError:
+                pass
+            
+            # WebP sources that already fit the box are usable as-is, skip decode and re-encode
+            if img.format == 'WEBP' and img.width <= THUMBNAIL_WIDTH and img.height <= THUMBNAIL_HEIGHT:
+                try:
+                    os.link(image_path, webp_path)
+                except OSError:
+                    shutil.copyfile(image_path, webp_path)
+                return webp_path, size
+            
+            if pyvips is not None:
+                # libvips fuses shrink-on-load, resize and colour conversion, and never decodes the full frame
+                try:
+                    thumb = pyvips.Image.thumbnail(image_path, THUMBNAIL_WIDTH, height=THUMBNAIL_HEIGHT, size="down")
+                    thumb.webpsave(webp_path, Q=WEBP_QUALITY, effort=WEBP_METHOD)
+                    return webp_path, size
+                except pyvips.Error as e:
+                    # e.g. a loader this libvips build lacks, Pillow may still read it
+                    print(f"⚠️ libvips failed on {image_path}, falling back: {e}")
+            
+            if USE_CWEBP and img.format in CWEBP_FORMATS:
+                cmd = ["cwebp", "-quiet", "-mt", "-q", str(WEBP_QUALITY), "-m", str(WEBP_METHOD)]
+                # Fit the box without upscaling; cwebp's -resize alone would stretch to the width
+                scale = min(THUMBNAIL_WIDTH / img.width, THUMBNAIL_HEIGHT / img.height)
+                if scale < 1:
+                    cmd += ["-resize", str(max(1, round(img.width * scale))), str(max(1, round(img.height * scale)))]
+                try:
+                    subprocess.run(cmd + [image_path, "-o", webp_path], check=True)
+                    return webp_path, size
+                except (subprocess.CalledProcessError, OSError) as e:
+                    # e.g. CMYK JPEGs, which Pillow converts fine
+                    print(f"⚠️ cwebp failed on {image_path}, falling back: {e}")
+            
+            # Let libjpeg downscale in the DCT domain while decoding large JPEGs, keeping 2x
+            # headroom (matching reducing_gap) over the fitted size, not the box: 1920x1080
+            # fits as 400x225, so it decodes at 960x540 rather than full size
+            resample = Image.Resampling.LANCZOS
+            if img.format == 'JPEG':
+                fit_width, fit_height = fitted_size(*size)
+                img.draft('RGB', (fit_width * 2, fit_height * 2))
+                if img.size != size:
+                    # draft() reduced the image, leaving between 2x and 4x to go, where Pillow's
+                    # antialiased BILINEAR looks the same as LANCZOS at a fraction of the cost
+                    resample = Image.Resampling.BILINEAR
+            
+            # Convert to RGB if necessary (for WebP compatibility); WebP sources already
+            # decode to RGB or RGBA, which the encoder takes as-is
+            if img.format != 'WEBP' and img.mode in ('RGBA', 'LA', 'P'):
                 img = img.convert('RGB')
             
             # Calculate dimensions maintaining aspect ratio
-            img.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT), Image.Resampling.LANCZOS)
+            img.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT), resample, reducing_gap=2.0)
             
-            # Save as WebP for better compression
-            webp_path = thumbnail_path.replace(os.path.splitext(thumbnail_path)[1], '.webp')
-            img.save(webp_path, 'WebP', quality=WEBP_QUALITY, optimize=True)
-            return webp_path
+            # Always save as WebP, whatever the source format, for better compression
+            img.save(webp_path, 'WebP', quality=WEBP_QUALITY, method=WEBP_METHOD)
+            return webp_path, size
     except Exception as e:
         print(f"❌ Failed to create thumbnail for {image_path}: {e}")
-        return None
+        return None, None
 
-def parse_filename_enhanced(fname):
-    """Enhanced filename parsing with better tag detection"""
-    name, _ = os.path.splitext(fname)
-    parts = name.lower().split("_")
+def parse_filename_enhanced(name):
+    """Enhanced filename parsing with better tag detection, takes the lowercased name without extension"""
+    parts = name.split("_")
     
-    # Try to detect tags from filename
-    detected_tags = []
-    for tag in AVAILABLE_TAGS:
-        if any(tag in part for part in parts):
-            detected_tags.append(tag)
+    # Detect tags appearing anywhere in the name, hand-typed names join words freely
+    # ("castle-nether", "redstonefarm"); str.__contains__ runs in C and keeps AVAILABLE_TAGS order
+    detected_tags = [tag for tag in AVAILABLE_TAGS if tag in name]
     
     if len(parts) >= 3:
         tag = parts[0]
@@ -60,6 +147,61 @@ def parse_filename_enhanced(fname):
         return tag, f"{date} {time}", detected_tags
     return "screenshot", "Unknown", detected_tags
 
+def build_image_record(fname, stem, lower_stem, aspect_ratio):
+    """Build an image record; the filename is parsed every time so tag changes reach cached images"""
+    tag, date_str, auto_tags = parse_filename_enhanced(lower_stem)
+    return {
+        "filename": fname,
+        "src": image_url(fname),
+        "thumbnail": f"{THUMBNAIL_FOLDER}/{stem}.webp",
+        "alt": fname,
+        "tag": tag,
+        "date": date_str,
+        "auto_tags": auto_tags,
+        "aspect_ratio": aspect_ratio
+    }
+
+def _process_one(task):
+    """Process pool entry point: build one image record, creating its thumbnail if missing"""
+    fname, stem, lower_stem, original_path, make_thumb = task
+    thumb_name = f"{stem}.webp"
+    
+    created_thumb = size = None
+    if make_thumb:
+        created_thumb, size = create_optimized_thumbnail(original_path, f"{THUMBNAIL_FOLDER}/{thumb_name}")
+    
+    # Get image dimensions for aspect ratio, only the header is read if no thumbnail was made
+    if size is None:
+        try:
+            with Image.open(original_path) as img:
+                size = img.size
+        except:
+            pass
+    aspect_ratio = size[0] / size[1] if size else 1.0
+    
+    return build_image_record(fname, stem, lower_stem, aspect_ratio), created_thumb
+
+def image_url(fname):
+    """Use R2 URL for full-size images if configured, otherwise local path"""
+    return f"{R2_BASE_URL}/{fname}" if R2_BASE_URL else f"{IMAGE_FOLDER}/{fname}"
+
+def load_cache():
+    """Load the previous run's [mtime, size, aspect_ratio] per filename"""
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return {fname: entry for fname, entry in json.load(f).items()
+                    if isinstance(entry, list) and len(entry) == 3}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def dump_json(path, data):
+    """Write compact JSON, it is read by code rather than people"""
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(data))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
 def generate_image_metadata():
     """Generate metadata file for faster loading"""
     metadata = {
@@ -69,66 +211,92 @@ def generate_image_metadata():
         "last_updated": None
     }
     
-    if not os.path.exists(IMAGE_FOLDER):
+    # Let scandir report missing folders instead of stat'ing them up front
+    entries = []
+    try:
+        with os.scandir(IMAGE_FOLDER) as it:
+            for entry in it:
+                fname = entry.name
+                # Lowercase once, for the extension check here and tag parsing in the workers
+                lower = fname.lower()
+                dot = fname.rfind('.')
+                # dot > 0 skips extensionless and dot-files, like os.path.splitext did
+                if dot > 0 and lower.endswith(VALID_EXTENSIONS) and entry.is_file():
+                    entries.append((fname, fname[:dot], lower[:dot], entry))
+    except FileNotFoundError:
         print(f"❌ Image folder '{IMAGE_FOLDER}' not found!")
         return metadata
+    entries.sort(key=itemgetter(0))
     
-    os.makedirs(THUMBNAIL_FOLDER, exist_ok=True)
+    try:
+        with os.scandir(THUMBNAIL_FOLDER) as it:
+            existing_thumbs = {entry.name for entry in it}
+    except FileNotFoundError:
+        os.makedirs(THUMBNAIL_FOLDER)
+        existing_thumbs = set()
     
-    for fname in sorted(os.listdir(IMAGE_FOLDER)):
-        ext = os.path.splitext(fname)[1].lower()
-        if ext in VALID_EXTENSIONS:
-            original_path = os.path.join(IMAGE_FOLDER, fname)
-            
-            # Create thumbnail
-            thumb_name = os.path.splitext(fname)[0] + '.webp'
-            thumb_path = os.path.join(THUMBNAIL_FOLDER, thumb_name)
-            
-            if not os.path.exists(thumb_path):
-                created_thumb = create_optimized_thumbnail(original_path, thumb_path)
-                if created_thumb:
-                    print(f"📸 Created optimized thumbnail: {thumb_name}")
-                    thumb_path = created_thumb
-            
-            # Parse filename for metadata
-            tag, date_str, auto_tags = parse_filename_enhanced(fname)
-            
-            # Get image dimensions for aspect ratio
+    # Reuse last run's aspect ratio when the source is unchanged and its thumbnail exists,
+    # leaving the slot None for everything that has to go through the pool.
+    # Methods are bound to locals since this loop runs once per image
+    cached_get = load_cache().get
+    images = [None] * len(entries)
+    stats = [None] * len(entries)
+    tasks = []
+    tasks_append = tasks.append
+    for i, (fname, stem, lower_stem, entry) in enumerate(entries):
+        thumb_exists = f"{stem}.webp" in existing_thumbs
+        st = entry.stat()
+        stats[i] = stat = [st.st_mtime, st.st_size]
+        cached = cached_get(fname)
+        
+        if cached is not None and cached[:2] == stat and (thumb_exists or LAZY_THUMBS):
+            images[i] = build_image_record(fname, stem, lower_stem, cached[2])
+            continue
+        
+        # A cache entry with a different mtime/size means the source changed, rebuild its thumbnail
+        make_thumb = not LAZY_THUMBS and (not thumb_exists or cached is not None)
+        if LAZY_THUMBS and thumb_exists and cached is not None:
+            # make_thumb.py only fills in missing thumbnails, so drop the stale one
             try:
-                with Image.open(original_path) as img:
-                    width, height = img.size
-                    aspect_ratio = width / height
-            except:
-                aspect_ratio = 1.0
-            
-            # Use R2 URL for full-size images if configured, otherwise local path
-            image_src = f"{R2_BASE_URL}/{fname}" if R2_BASE_URL else f"{IMAGE_FOLDER}/{fname}"
-
-            image_data = {
-                "filename": fname,
-                "src": image_src,
-                "thumbnail": f"{THUMBNAIL_FOLDER}/{thumb_name}",
-                "alt": fname,
-                "tag": tag,
-                "date": date_str,
-                "auto_tags": auto_tags,
-                "aspect_ratio": aspect_ratio,
-                "hash": hashlib.md5(fname.encode()).hexdigest()[:8]  # For unique IDs
-            }
+                os.remove(f"{THUMBNAIL_FOLDER}/{stem}.webp")
+            except FileNotFoundError:
+                pass
+        tasks_append((fname, stem, lower_stem, entry.path, make_thumb))
+    
+    # Per-image work (thumbnail, dimensions) is independent and CPU-bound
+    if tasks:
+        workers = min(MAX_WORKERS, len(tasks))
+        with ExitStack() as stack:
+            if workers > 1:
+                # Small enough chunks that every worker gets a share of a short task list
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                results = executor.map(_process_one, tasks, chunksize=max(1, min(8, len(tasks) // (workers * 4))))
+            else:
+                # Not worth starting a pool for a single worker
+                results = map(_process_one, tasks)
             
-            metadata["images"].append(image_data)
-            metadata["tags"].update(auto_tags)
-            metadata["total_count"] += 1
+            for i, image_data in enumerate(images):
+                if image_data is None:
+                    images[i], created_thumb = next(results)
+                    if created_thumb:
+                        print(f"📸 Created optimized thumbnail: {os.path.basename(created_thumb)}")
+    
+    tags = set()
+    tags_update = tags.update
+    for image_data in images:
+        tags_update(image_data["auto_tags"])
     
-    metadata["tags"] = list(metadata["tags"])
+    metadata["images"] = images
+    metadata["total_count"] = len(images)
+    metadata["tags"] = sorted(tags)
     
-    # Save metadata to JSON for potential future use
-    with open(os.path.join(OUTPUT_FOLDER, "gallery_metadata.json"), "w") as f:
-        json.dump(metadata, f, indent=2)
+    dump_json(os.path.join(OUTPUT_FOLDER, METADATA_FILE), metadata)
+    dump_json(CACHE_FILE, {img["filename"]: [*stat, img["aspect_ratio"]] for img, stat in zip(images, stats)})
     
     print(f"✅ Generated metadata for {metadata['total_count']} images")
     return metadata
 
+@cache
 def generate_minecraft_css():
     """Generate Minecraft-themed CSS"""
     return """
@@ -275,12 +443,8 @@ def generate_minecraft_css():
         border: 1px solid var(--mc-light);
     }
     
-    .pagination {
-        display: flex;
-        justify-content: center;
-        gap: 5px;
-        margin: 20px 0;
-        flex-wrap: wrap;
+    .gallery-sentinel {
+        height: 1px;
     }
     
     .slideshow-modal {
@@ -359,6 +523,7 @@ def generate_minecraft_css():
     }
     """
 
+@cache
 def generate_minecraft_js():
     """Generate JavaScript for slideshow and interactions"""
     return """
@@ -368,6 +533,9 @@ def generate_minecraft_js():
             this.currentSlide = 0;
             this.images = [];
             this.filteredImages = [];
+            this.rendered = 0;
+            this.container = document.querySelector('.gallery');
+            this.batchSize = Number(this.container.dataset.batch) || 20;
             this.init();
         }
         
@@ -411,22 +579,100 @@ def generate_minecraft_js():
                     }
                 }
             });
+            
+            // Render the next batch of cards whenever the end of the gallery scrolls into view
+            this.sentinel = document.querySelector('.gallery-sentinel');
+            this.observer = new IntersectionObserver((entries) => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    this.renderBatch();
+                }
+            }, { rootMargin: '600px 0px' });
         }
         
-        loadImages() {
-            this.images = Array.from(document.querySelectorAll('.image-card')).map((card, index) => {
-                const img = card.querySelector('.thumbnail');
-                const info = card.querySelector('.image-info');
-                return {
-                    index,
-                    src: img.dataset.fullSrc || img.src,
-                    thumbnail: img.src,
-                    alt: img.alt,
-                    info: info.innerHTML,
-                    element: card
-                };
-            });
-            this.filteredImages = [...this.images];
+        async loadImages() {
+            try {
+                // Revalidate so a rebuilt gallery shows up without a hard refresh
+                const response = await fetch(this.container.dataset.src, { cache: 'no-cache' });
+                const metadata = await response.json();
+                this.images = metadata.images;
+            } catch (err) {
+                this.setStatus('Could not load the gallery, try reloading the page.');
+                return;
+            }
+            // Re-apply any filter picked while the metadata was still loading
+            this.filterImages(this.currentFilter);
+        }
+        
+        setStatus(text) {
+            document.getElementById('gallery-status').textContent = text;
+        }
+        
+        resetGallery() {
+            this.container.replaceChildren();
+            this.rendered = 0;
+            this.setStatus(`${this.filteredImages.length} of ${this.images.length} screenshots`);
+            this.observer.disconnect();
+            this.observer.observe(this.sentinel);
+        }
+        
+        renderBatch() {
+            const end = Math.min(this.rendered + this.batchSize, this.filteredImages.length);
+            const fragment = document.createDocumentFragment();
+            for (let index = this.rendered; index < end; index++) {
+                fragment.appendChild(this.renderCard(this.filteredImages[index], index));
+            }
+            this.container.appendChild(fragment);
+            this.rendered = end;
+            
+            if (this.rendered >= this.filteredImages.length) {
+                this.observer.disconnect();
+            } else {
+                // Observing again reports the sentinel's current state, so a screen
+                // that is still not full keeps pulling batches
+                this.observer.unobserve(this.sentinel);
+                this.observer.observe(this.sentinel);
+            }
+        }
+        
+        renderCard(img, index) {
+            const card = document.createElement('div');
+            card.className = 'image-card';
+            
+            const thumb = document.createElement('img');
+            thumb.src = img.thumbnail;
+            thumb.alt = img.alt;
+            thumb.className = 'thumbnail';
+            thumb.loading = 'lazy';
+            thumb.addEventListener('click', () => this.openSlideshow(index));
+            
+            card.append(thumb, this.renderInfo(img));
+            return card;
+        }
+        
+        renderInfo(img) {
+            const info = document.createElement('div');
+            info.className = 'image-info';
+            
+            const tag = document.createElement('div');
+            tag.className = 'image-tag';
+            tag.textContent = img.tag;
+            const date = document.createElement('div');
+            date.className = 'image-date';
+            date.textContent = img.date;
+            info.append(tag, date);
+            
+            if (img.auto_tags.length) {
+                const chips = document.createElement('div');
+                chips.className = 'auto-tags';
+                for (const name of img.auto_tags) {
+                    const chip = document.createElement('span');
+                    chip.className = 'tag-chip';
+                    chip.textContent = name;
+                    chips.appendChild(chip);
+                }
+                info.appendChild(chips);
+            }
+            return info;
         }
         
         openSlideshow(index) {
@@ -455,7 +701,7 @@ def generate_minecraft_js():
             const img = this.filteredImages[this.currentSlide];
             document.getElementById('slideshow-img').src = img.src;
             document.getElementById('slideshow-img').alt = img.alt;
-            document.getElementById('slideshow-info').innerHTML = img.info;
+            document.getElementById('slideshow-info').replaceChildren(...this.renderInfo(img).childNodes);
         }
         
         filterImages(tag) {
@@ -467,16 +713,11 @@ def generate_minecraft_js():
             });
             document.querySelector(`[data-filter="${tag}"]`).classList.add('active');
             
-            // Filter images
-            this.images.forEach((img, index) => {
-                const shouldShow = tag === 'all' || img.info.toLowerCase().includes(tag);
-                img.element.style.display = shouldShow ? 'block' : 'none';
-            });
-            
-            // Update filtered array for slideshow
-            this.filteredImages = this.images.filter((img, index) => {
-                return tag === 'all' || img.info.toLowerCase().includes(tag);
-            });
+            // Filter across the whole gallery, not just the cards rendered so far
+            this.filteredImages = tag === 'all'
+                ? this.images
+                : this.images.filter(img => img.auto_tags.includes(tag));
+            this.resetGallery();
         }
         
         startSlideshow() {
@@ -498,60 +739,14 @@ def generate_minecraft_js():
     let gallery;
     document.addEventListener('DOMContentLoaded', function() {
         gallery = new MinecraftGallery();
-        
-        // Add click handlers to thumbnails
-        document.querySelectorAll('.thumbnail').forEach((img, index) => {
-            img.addEventListener('click', () => gallery.openSlideshow(index));
-        });
     });
     """
 
-def generate_lore_page():
-    """Generate a themed lore page from carcosa.md"""
-    lore_file = "carcosa.md"
-    if not os.path.exists(lore_file):
-        print("⚠️ carcosa.md not found, skipping lore page")
-        return
-
-    with open(lore_file, "r", encoding="utf-8") as f:
-        raw_text = f.read()
-
-    # Split into paragraphs and convert to HTML
-    paragraphs = [p.strip() for p in raw_text.strip().split("\n\n") if p.strip()]
-    body_html = ""
-    in_signature = False
-    for p in paragraphs:
-        # Detect the inhabitants list
-        if p.startswith("Inhabitants of the Land:"):
-            body_html += '<h2 class="lore-heading">Inhabitants of the Land</h2>\n'
-        elif p.startswith("Signed on this day,"):
-            in_signature = True
-            body_html += '<div class="lore-signature">\n'
-            sig_lines = p.split("\n")
-            for line in sig_lines:
-                body_html += f'<p>{line.strip()}</p>\n'
-            body_html += '</div>\n'
-        elif ", the " in p and len(p) < 200 and not in_signature:
-            # Character entry
-            name, title = p.split(", the ", 1)
-            body_html += f'<div class="lore-inhabitant"><span class="inhabitant-name">{name}</span>, the {title}</div>\n'
-        elif in_signature:
-            body_html += f'<p class="lore-sign-line">{p}</p>\n'
-        else:
-            body_html += f'<p class="lore-paragraph">{p}</p>\n'
-
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <title>The Decree of Carcosa</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="description" content="The founding lore of the Township of Carcosa - a Minecraft server history">
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <style>{generate_minecraft_css()}
-
-    .lore-scroll {{
+@cache
+def generate_lore_css():
+    """Generate the parchment styles used on top of the gallery CSS by the lore page"""
+    return """
+    .lore-scroll {
         background: linear-gradient(to bottom, #d4a574, #c4956a, #d4a574);
         border: 4px solid var(--mc-dirt);
         padding: 40px 30px;
@@ -559,10 +754,10 @@ def generate_lore_page():
         color: #2a1a0a;
         box-shadow: inset 0 0 30px rgba(0,0,0,0.2), 0 4px 12px rgba(0,0,0,0.4);
         position: relative;
-    }}
+    }
 
     .lore-scroll::before,
-    .lore-scroll::after {{
+    .lore-scroll::after {
         content: '';
         display: block;
         height: 12px;
@@ -570,76 +765,131 @@ def generate_lore_page():
         border-radius: 6px;
         margin: -40px -30px 30px -30px;
         box-shadow: 0 2px 4px rgba(0,0,0,0.3);
-    }}
+    }
 
-    .lore-scroll::after {{
+    .lore-scroll::after {
         margin: 30px -30px -40px -30px;
-    }}
+    }
 
-    .lore-title {{
+    .lore-title {
         text-align: center;
         color: #2a1a0a;
         font-size: clamp(10px, 3vw, 18px);
         margin-bottom: 30px;
         text-shadow: 1px 1px 0px rgba(255,255,255,0.3);
         line-height: 1.6;
-    }}
+    }
 
-    .lore-paragraph {{
+    .lore-paragraph {
         font-family: 'Press Start 2P', monospace;
         font-size: clamp(7px, 1.5vw, 9px);
         line-height: 2.2;
         margin-bottom: 20px;
         text-align: justify;
         text-indent: 2em;
-    }}
+    }
 
-    .lore-heading {{
+    .lore-heading {
         font-family: 'Press Start 2P', monospace;
         font-size: clamp(9px, 2vw, 12px);
         color: #2a1a0a;
         text-align: center;
         margin: 30px 0 20px 0;
         text-shadow: 1px 1px 0px rgba(255,255,255,0.3);
-    }}
+    }
 
-    .lore-inhabitant {{
+    .lore-inhabitant {
         font-family: 'Press Start 2P', monospace;
         font-size: clamp(7px, 1.5vw, 9px);
         line-height: 2;
         padding: 8px 0;
         border-bottom: 1px dashed rgba(42, 26, 10, 0.3);
         text-align: center;
-    }}
+    }
 
-    .inhabitant-name {{
+    .inhabitant-name {
         color: #5c1a00;
         font-weight: bold;
-    }}
+    }
 
-    .lore-signature {{
+    .lore-signature {
         text-align: center;
         margin-top: 30px;
         font-family: 'Press Start 2P', monospace;
         font-size: clamp(7px, 1.5vw, 8px);
         line-height: 2.2;
-    }}
+    }
 
-    .lore-sign-line {{
+    .lore-sign-line {
         text-align: center;
         font-family: 'Press Start 2P', monospace;
         font-size: clamp(7px, 1.5vw, 8px);
         line-height: 2.2;
         margin: 4px 0;
-    }}
+    }
 
-    .lore-nav {{
+    .lore-nav {
         display: flex;
         justify-content: center;
         gap: 10px;
         margin-top: 20px;
-    }}
-    </style>
+    }
+    """
+
+def iter_paragraphs(lines):
+    """Group lines into blank-line separated paragraphs without reading the whole file"""
+    block = []
+    for line in lines:
+        if line.strip():
+            block.append(line.rstrip("\n"))
+        elif block:
+            yield "\n".join(block).strip()
+            block = []
+    if block:
+        yield "\n".join(block).strip()
+
+def generate_lore_page():
+    """Generate a themed lore page from carcosa.md"""
+    lore_file = "carcosa.md"
+    if not os.path.exists(lore_file):
+        print("⚠️ carcosa.md not found, skipping lore page")
+        return
+
+    # Convert paragraphs to HTML as they are read
+    parts = []
+    in_signature = False
+    with open(lore_file, "r", encoding="utf-8") as f:
+        for p in iter_paragraphs(f):
+            # Detect the inhabitants list
+            if p.startswith("Inhabitants of the Land:"):
+                parts.append('<h2 class="lore-heading">Inhabitants of the Land</h2>\n')
+            elif p.startswith("Signed on this day,"):
+                in_signature = True
+                parts.append('<div class="lore-signature">\n')
+                for line in p.split("\n"):
+                    parts.append(f'<p>{line.strip()}</p>\n')
+                parts.append('</div>\n')
+            elif ", the " in p and len(p) < 200 and not in_signature:
+                # Character entry
+                name, title = p.split(", the ", 1)
+                parts.append(f'<div class="lore-inhabitant"><span class="inhabitant-name">{name}</span>, the {title}</div>\n')
+            elif in_signature:
+                parts.append(f'<p class="lore-sign-line">{p}</p>\n')
+            else:
+                parts.append(f'<p class="lore-paragraph">{p}</p>\n')
+    body_html = "".join(parts)
+
+    html = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>The Decree of Carcosa</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta name="description" content="The founding lore of the Township of Carcosa - a Minecraft server history">
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+    <link rel="stylesheet" href="gallery.css">
+    <link rel="stylesheet" href="lore.css">
 </head>
 <body>
     <div class="container">
@@ -655,54 +905,32 @@ def generate_lore_page():
 </body>
 </html>"""
 
+    Path(OUTPUT_FOLDER, "lore.css").write_bytes(generate_lore_css().encode('utf-8'))
     lore_path = os.path.join(OUTPUT_FOLDER, "carcosa.html")
-    with open(lore_path, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"📜 Generated lore page: {lore_path}")
+    if write_if_changed(lore_path, [html.encode('utf-8')]):
+        print(f"📜 Generated lore page: {lore_path}")
+    else:
+        print(f"⏭️  Unchanged lore page: {lore_path}")
 
 
-def generate_enhanced_html(images, page_num, total_pages, metadata):
-    """Generate enhanced HTML with Minecraft theme and performance optimizations"""
-    
-    # Generate filter buttons from available tags
-    filter_buttons = '<button class="mc-button filter-btn active" data-filter="all" onclick="gallery.filterImages(\'all\')">All</button>'
-    for tag in sorted(metadata["tags"]):
-        filter_buttons += f'<button class="mc-button filter-btn" data-filter="{tag}" onclick="gallery.filterImages(\'{tag}\')">{tag.title()}</button>'
-    
-    # Generate navigation
-    nav = '<div class="pagination">'
-    if page_num > 1:
-        nav += f'<a href="{OUTPUT_PREFIX}.html" class="mc-button">« First</a>'
-        prev_suffix = "" if page_num == 2 else str(page_num - 1)
-        nav += f'<a href="{OUTPUT_PREFIX}{prev_suffix}.html" class="mc-button">‹ Prev</a>'
-    
-    for i in range(1, total_pages + 1):
-        suffix = "" if i == 1 else str(i)
-        class_name = "mc-button active" if i == page_num else "mc-button"
-        nav += f'<a href="{OUTPUT_PREFIX}{suffix}.html" class="{class_name}">Page {i}</a>'
-    
-    if page_num < total_pages:
-        nav += f'<a href="{OUTPUT_PREFIX}{page_num + 1}.html" class="mc-button">Next ›</a>'
-        nav += f'<a href="{OUTPUT_PREFIX}{total_pages}.html" class="mc-button">Last »</a>'
-    
-    nav += '</div>'
-    
-    html = f"""<!DOCTYPE html>
+# The gallery page is a static shell, its cards are rendered in the browser from the metadata file
+_PAGE_TEMPLATE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
-    <title>🎮 Minecraft Server Gallery - Page {page_num}</title>
+    <title>🎮 Minecraft Server Gallery</title>
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <meta name="description" content="Minecraft server screenshots, builds, and events gallery">
     <link rel="preconnect" href="https://fonts.googleapis.com">
     <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <style>{generate_minecraft_css()}</style>
+    <link rel="stylesheet" href="gallery.css">
+    <script src="gallery.js" defer></script>
 </head>
 <body>
     <div class="container">
         <h1>🎮 Minecraft Server Gallery</h1>
-        <p style="text-align: center; font-size: 8px; margin-bottom: 20px; color: var(--mc-blue);">
-            Page {page_num} of {total_pages} • {len(images)} images • Total: {metadata['total_count']} screenshots
+        <p id="gallery-status" style="text-align: center; font-size: 8px; margin-bottom: 20px; color: var(--mc-blue);">
+            Total: {total_count} screenshots
         </p>
         
         <div class="controls">
@@ -711,45 +939,43 @@ def generate_enhanced_html(images, page_num, total_pages, metadata):
             <a href="carcosa.html" class="mc-button">📜 Lore</a>
         </div>
         
-        <div class="gallery">
-"""
-    
-    for img in images:
-        # Create tags display
-        tags_html = ""
-        if img.get('auto_tags'):
-            tags_html = '<div class="auto-tags">' + ''.join([f'<span class="tag-chip">{tag}</span>' for tag in img['auto_tags']]) + '</div>'
-        
-        html += f"""
-            <div class="image-card">
-                <img src="{img['thumbnail']}" 
-                     data-full-src="{img['src']}" 
-                     alt="{img['alt']}" 
-                     class="thumbnail"
-                     loading="lazy">
-                <div class="image-info">
-                    <div class="image-tag">{img['tag']}</div>
-                    <div class="image-date">{img['date']}</div>
-                    {tags_html}
-                </div>
-            </div>
-"""
-    
-    html += f"""
-        </div>
-        {nav}
+        <noscript><p style="text-align: center; font-size: 8px;">The gallery needs JavaScript to show the screenshots.</p></noscript>
+        <div class="gallery" data-src="{metadata_file}" data-batch="{batch_size}"></div>
+        <div class="gallery-sentinel"></div>
     </div>
-    
-    <script>{generate_minecraft_js()}</script>
 </body>
 </html>"""
+
+def write_if_changed(filename, chunks):
+    """Write a list of byte chunks behind a content-hash comment, skipping the write if the file already matches"""
+    digest = hashlib.blake2b(digest_size=8)
+    for chunk in chunks:
+        digest.update(chunk)
+    marker = f"<!-- h:{digest.hexdigest()} -->\n".encode('ascii')
+    try:
+        with open(filename, "rb") as f:
+            if f.readline() == marker:
+                return False
+    except FileNotFoundError:
+        pass
     
-    return html
+    with open(filename, "wb", buffering=1 << 20) as f:
+        f.write(marker)
+        f.writelines(chunks)
+    return True
+
+def remove_stale_pages():
+    """Remove numbered pages (index2.html, ...) left over from the old paginated layout"""
+    with os.scandir(OUTPUT_FOLDER) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith(OUTPUT_PREFIX) and name.endswith(".html") and name[len(OUTPUT_PREFIX):-len(".html")].isdigit():
+                os.remove(entry.path)
+                print(f"🗑️  Removed old page: {entry.path}")
 
 def write_enhanced_pages(metadata):
-    """Write enhanced gallery pages"""
-    images = metadata["images"]
-    total = len(images)
+    """Write the gallery page, a single shell that loads the metadata file and pages through it client-side"""
+    total = metadata["total_count"]
     
     if total == 0:
         print("❌ No images found to generate gallery!")
@@ -757,27 +983,44 @@ def write_enhanced_pages(metadata):
     
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
     
-    total_pages = ceil(total / IMAGES_PER_PAGE)
+    # Shared with the lore page, so browsers download and cache them once
+    Path(OUTPUT_FOLDER, "gallery.css").write_bytes(generate_minecraft_css().encode('utf-8'))
+    Path(OUTPUT_FOLDER, "gallery.js").write_bytes(generate_minecraft_js().encode('utf-8'))
     
-    for page_num in range(1, total_pages + 1):
-        start = (page_num - 1) * IMAGES_PER_PAGE
-        end = start + IMAGES_PER_PAGE
-        page_images = images[start:end]
-        
-        html = generate_enhanced_html(page_images, page_num, total_pages, metadata)
-        
-        suffix = "" if page_num == 1 else str(page_num)
-        filename = os.path.join(OUTPUT_FOLDER, f"{OUTPUT_PREFIX}{suffix}.html")
-        
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(html)
-        
+    # Generate filter buttons from available tags
+    filter_parts = ['<button class="mc-button filter-btn active" data-filter="all" onclick="gallery.filterImages(\'all\')">All</button>']
+    for tag in metadata["tags"]:
+        filter_parts.append(f'<button class="mc-button filter-btn" data-filter="{tag}" onclick="gallery.filterImages(\'{tag}\')">{tag.title()}</button>')
+    
+    html = _PAGE_TEMPLATE.format(
+        total_count=total,
+        filter_buttons=''.join(filter_parts),
+        metadata_file=METADATA_FILE,
+        batch_size=IMAGES_PER_PAGE,
+    )
+    
+    filename = os.path.join(OUTPUT_FOLDER, f"{OUTPUT_PREFIX}.html")
+    if write_if_changed(filename, [html.encode('utf-8')]):
         print(f"📄 Generated enhanced page: {filename}")
+    else:
+        print(f"⏭️  Unchanged page: {filename}")
+    remove_stale_pages()
     
-    print(f"✅ {total_pages} enhanced page(s) generated with {total} images")
+    print(f"✅ Gallery page generated for {total} images")
+
+def describe_pillow_build():
+    """Describe the Pillow build doing the resizing; pillow-simd versions carry a .postN suffix"""
+    simd = "post" in PIL.__version__
+    turbo = features.check_feature("libjpeg_turbo")
+    return f"Pillow {PIL.__version__} (SIMD: {'yes' if simd else 'no'}, libjpeg-turbo: {'yes' if turbo else 'no'})"
 
 def main():
     print("🎮 Starting enhanced Minecraft gallery generation...")
+    print(f"🖼️  Using {describe_pillow_build()}")
+    if pyvips is not None:
+        print(f"🖼️  Thumbnails resized with libvips {pyvips.version(0)}.{pyvips.version(1)}.{pyvips.version(2)}")
+    elif USE_CWEBP:
+        print(f"🖼️  Thumbnails encoded with cwebp where it can read the source")
     metadata = generate_image_metadata()
     
     if metadata["total_count"] == 0:
@@ -790,8 +1033,8 @@ def main():
     print(f"🚀 Performance improvements:")
     print(f"   • WebP thumbnails for faster loading")
     print(f"   • Lazy loading for images")
-    print(f"   • Reduced images per page ({IMAGES_PER_PAGE})")
-    print(f"   • Auto-generated tags and filtering")
+    print(f"   • Cards rendered {IMAGES_PER_PAGE} at a time as you scroll")
+    print(f"   • Auto-generated tags and filtering across the whole gallery")
     print(f"   • Slideshow functionality")
 
 if __name__ == "__main__":
@@ -0,0 +1,34 @@
+import os
+import sys
+
+from generate_gallery import IMAGE_FOLDER, THUMBNAIL_FOLDER, VALID_EXTENSIONS, create_optimized_thumbnail
+
+def find_source(stem):
+    with os.scandir(IMAGE_FOLDER) as it:
+        for entry in it:
+            name = entry.name
+            if name.rpartition('.')[0] == stem and name.lower().endswith(VALID_EXTENSIONS):
+                return entry.path
+    return None
+
+def make_thumb(thumb_name):
+    """Create one thumbnail, given its name or path, e.g. from a rewrite rule for a missing .webp"""
+    stem = os.path.splitext(os.path.basename(thumb_name))[0]
+    source = find_source(stem)
+    if source is None:
+        print(f"❌ No source image found for {thumb_name}")
+        return None
+
+    os.makedirs(THUMBNAIL_FOLDER, exist_ok=True)
+    webp_path, _ = create_optimized_thumbnail(source, f"{THUMBNAIL_FOLDER}/{stem}.webp")
+    if webp_path:
+        print(f"📸 Created optimized thumbnail: {os.path.basename(webp_path)}")
+    return webp_path
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <thumbnail name>...")
+        sys.exit(1)
+
+    failed = [name for name in sys.argv[1:] if make_thumb(name) is None]
+    sys.exit(1 if failed else 0)